@@ -2,50 +2,172 @@
 import sys
 import os
 import json
-import random
 import shutil
+import functools
+import threading
+import time
+import bisect
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+import PIL
 from PIL import Image
 
+try:
+    import orjson
+except ImportError:  # optional: persistence falls back to stdlib json
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # optional: compositing falls back to the NumPy blend
+    njit = None
+
 from PySide6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QListWidget, QLineEdit, QFileDialog, QSpinBox, QMessageBox, QTabWidget,
-    QGroupBox, QComboBox, QTableWidget, QTableWidgetItem, QHeaderView,
-    QTextEdit, QProgressBar
+    QListWidget, QListWidgetItem, QLineEdit, QFileDialog, QSpinBox, QMessageBox, QTabWidget,
+    QGroupBox, QComboBox, QCheckBox, QTableView, QHeaderView, QAbstractItemView,
+    QStyledItemDelegate, QTextEdit, QPlainTextEdit, QProgressBar, QProgressDialog
+)
+from PySide6.QtCore import (
+    Qt, QThread, QTimer, Signal, QSignalBlocker, QAbstractTableModel, QModelIndex
 )
-from PySide6.QtCore import Qt, QThread, Signal
 
 
 # =========================================================
 # Pillow resample helper (compat across versions)
 # =========================================================
-def _resample_lanczos():
-    try:
-        return Image.Resampling.LANCZOS
-    except AttributeError:
+RESAMPLE_NAMES = ("lanczos", "bicubic", "bilinear", "box")
+
+
+def _resample_filters():
+    """
+    Resolve each name in RESAMPLE_NAMES to its Pillow filter. Runs once at
+    import; very old Pillows without a filter get bicubic instead.
+    """
+    ns = getattr(Image, "Resampling", Image)
+    filters = {}
+    for name in RESAMPLE_NAMES:
         try:
-            return Image.LANCZOS
+            filters[name] = getattr(ns, name.upper())
         except AttributeError:
-            return Image.BICUBIC
+            filters[name] = Image.BICUBIC
+    return filters
+
+
+RESAMPLE_FILTERS = _resample_filters()
+RESAMPLE = RESAMPLE_FILTERS["lanczos"]
+
+
+def _get_resample(name):
+    """Pillow filter for a resample name; unknown names fall back to lanczos."""
+    return RESAMPLE_FILTERS.get(str(name or "lanczos").lower(), RESAMPLE)
+
+
+def _accel_summary():
+    """
+    One log line naming the optional speedups in use. Pillow-SIMD keeps the
+    PIL package name and marks its releases with a ".postN" version suffix.
+    """
+    version = PIL.__version__
+    pillow = f"Pillow-SIMD {version}" if ".post" in version else f"Pillow {version} (Pillow-SIMD not installed)"
+    blend = "numba blend" if njit is not None else "NumPy blend (numba not installed)"
+    return f"ℹ️ {pillow}; {blend}"
 
 
-RESAMPLE_LANCZOS = _resample_lanczos()
+IMAGE_FORMATS = ("png", "webp")
 
 
 # =========================================================
 # Helpers for JSON persistence
 # =========================================================
+def _json_dumps(data, indent=True, sort_keys=False):
+    """
+    Serialize to UTF-8 bytes with a trailing newline; 2-space indented, or
+    compact when indent=False. Uses orjson when installed.
+    """
+    if orjson is not None:
+        option = orjson.OPT_APPEND_NEWLINE
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(data, option=option)
+    if indent:
+        text = json.dumps(data, indent=2, ensure_ascii=False, sort_keys=sort_keys)
+    else:
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False, sort_keys=sort_keys)
+    return (text + "\n").encode("utf-8")
+
+
+def _json_loads(raw):
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
 def load_json(path, default):
     try:
-        with open(path, "r") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except Exception:
         return default
 
 
+# Directories save_json has already created this session.
+_prepared_dirs = set()
+
+
 def save_json(path, data):
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w") as f:
-        json.dump(data, f, indent=4)
+    """Write sorted, indented JSON atomically (temp file + os.replace)."""
+    folder = os.path.dirname(path)
+    if folder and folder not in _prepared_dirs:
+        os.makedirs(folder, exist_ok=True)
+        _prepared_dirs.add(folder)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_json_dumps(data, sort_keys=True))
+    os.replace(tmp, path)
+
+
+class JsonBatchWriter:
+    """
+    Buffers per-edition metadata in memory and writes it out every
+    `flush_every` entries, as compact JSON: one <key>.json file each, or
+    appended as lines of a single metadata.jsonl when jsonl=True.
+    """
+
+    def __init__(self, out_dir, flush_every=1000, jsonl=False):
+        self.out_dir = out_dir
+        self.flush_every = flush_every
+        self.jsonl = jsonl
+        self._pending = []
+        self._prefix = os.path.join(out_dir, "")
+        self._jsonl_path = os.path.join(out_dir, "metadata.jsonl")
+        if jsonl:
+            # start a fresh file for this run
+            open(self._jsonl_path, "wb").close()
+
+    def add(self, key, data):
+        self._pending.append((key, data))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        if self.jsonl:
+            with open(self._jsonl_path, "ab", buffering=1 << 20) as f:
+                for _, data in self._pending:
+                    f.write(_json_dumps(data, indent=False))
+        else:
+            for key, data in self._pending:
+                with open(self._prefix + str(key) + ".json", "wb") as f:
+                    f.write(_json_dumps(data, indent=False))
+        self._pending.clear()
+
+    def close(self):
+        self.flush()
 
 
 # =========================================================
@@ -56,25 +178,160 @@ class GenerationWorker(QThread):
     progress_signal = Signal(int, int)
     done_signal = Signal(dict)
 
+    # Log lines are sent to the GUI in batches, at most every LOG_FLUSH_SECS
+    # or LOG_FLUSH_LINES lines, instead of one queued signal per line.
+    LOG_FLUSH_SECS = 0.1
+    LOG_FLUSH_LINES = 200
+    # Progress updates are capped at ~60 Hz; the final one always goes out.
+    PROGRESS_MIN_SECS = 0.016
+
     def __init__(self, config, quantity):
         super().__init__()
         self.config = config
         self.quantity = quantity
+        self._log_buf = []
+        self._log_t0 = 0.0
+        self._last_emit = 0.0
+
+    def _buffer_log(self, msg):
+        self._log_buf.append(msg)
+        if (len(self._log_buf) >= self.LOG_FLUSH_LINES
+                or time.monotonic() - self._log_t0 > self.LOG_FLUSH_SECS):
+            self._flush_log()
+
+    def _flush_log(self):
+        if self._log_buf:
+            self.log_signal.emit("\n".join(self._log_buf))
+            self._log_buf = []
+        self._log_t0 = time.monotonic()
+
+    def _report_progress(self, done, total):
+        now = time.monotonic()
+        if done >= total or now - self._last_emit > self.PROGRESS_MIN_SECS:
+            self._last_emit = now
+            self.progress_signal.emit(done, total)
 
     def run(self):
-        stats = run_generation(
-            self.config,
-            self.quantity,
-            log_callback=lambda msg: self.log_signal.emit(msg),
-            progress_callback=lambda done, total: self.progress_signal.emit(done, total),
-        )
+        self._log_t0 = time.monotonic()
+        try:
+            stats = run_generation(
+                self.config,
+                self.quantity,
+                log_callback=self._buffer_log,
+                progress_callback=self._report_progress,
+            )
+        finally:
+            self._flush_log()
         self.done_signal.emit(stats)
 
 
+# =========================================================
+# Rarity tables (model + spinbox delegate)
+# =========================================================
+class TraitRarityModel(QAbstractTableModel):
+    """Label columns followed by one editable 0-100 rarity column.
+
+    Values live in a flat int8 array indexed by row (1 byte per trait);
+    no widget exists per row.
+    """
+
+    def __init__(self, headers, parent=None):
+        super().__init__(parent)
+        self.headers = list(headers)
+        self.value_column = len(self.headers) - 1
+        self.rows = []            # label tuples, one per row
+        self.keys = []            # mapping key per row ("Layer" or "Layer:Trait")
+        self.values = np.zeros(0, dtype=np.int8)
+        self._row_of = {}
+
+    def reset_rows(self, rows, keys, saved=None, default=100):
+        """
+        Replace all rows in one model reset. `saved` is an optional
+        {key: value} dict applied on top of `default`; unknown keys are ignored.
+        """
+        self.beginResetModel()
+        self.rows = rows
+        self.keys = keys
+        self.values = np.full(len(keys), default, dtype=np.int8)
+        self._row_of = {k: i for i, k in enumerate(keys)}
+        for k, v in (saved or {}).items():
+            r = self._row_of.get(k)
+            if r is None:
+                continue
+            try:
+                self.values[r] = max(0, min(100, int(v)))
+            except (TypeError, ValueError):
+                pass
+        self.endResetModel()
+
+    def as_dict(self):
+        return dict(zip(self.keys, self.values.tolist()))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        r, c = index.row(), index.column()
+        if c == self.value_column:
+            if role in (Qt.DisplayRole, Qt.EditRole):
+                return int(self.values[r])
+        elif role == Qt.DisplayRole:
+            return self.rows[r][c]
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not index.isValid() or index.column() != self.value_column:
+            return False
+        self.values[index.row()] = max(0, min(100, int(value)))
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        if index.column() == self.value_column:
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+
+class SpinBoxDelegate(QStyledItemDelegate):
+    """Creates a 0-100 QSpinBox only while a rarity cell is being edited."""
+
+    def createEditor(self, parent, option, index):
+        sp = QSpinBox(parent)
+        sp.setRange(0, 100)
+        return sp
+
+    def setEditorData(self, editor, index):
+        editor.setValue(int(index.data(Qt.EditRole) or 0))
+
+    def setModelData(self, editor, model, index):
+        editor.interpretText()
+        model.setData(index, editor.value(), Qt.EditRole)
+
+
 # =========================================================
 # Main GUI
 # =========================================================
 class NFTGeneratorGUI(QWidget):
+    # Config edits are coalesced and written this long after the last one.
+    CONFIG_SAVE_DELAY_MS = 250
+    # Rarity edits are coalesced into one update this long after the last one.
+    MAPPING_DIRTY_DELAY_MS = 300
+    # Output folders deleted concurrently by master reset.
+    RESET_THREADS = 8
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("C3 NFT STUDIO")
@@ -83,28 +340,125 @@ class NFTGeneratorGUI(QWidget):
         # Persistence stores
         self.saved_configs_path = os.path.join("configs", "saved_configs.json")
         self.saved_mappings_path = os.path.join("configs", "saved_mappings.json")
+        self.layer_cache_path = os.path.join("configs", ".layer_cache.json")
 
         self.configs = load_json(self.saved_configs_path, {})
         self.mappings = load_json(self.saved_mappings_path, {})
+        # config names kept sorted as configs are added (bisect.insort)
+        self._sorted_config_names = sorted(self.configs.keys())
+        # { layers_dir: {"mtime": newest folder mtime_ns, "tree": {layer: [png, ...]}} }
+        self._layer_tree_cache = load_json(self.layer_cache_path, {})
+
+        # Debounced writer for saved_configs.json (see _schedule_config_save)
+        self._config_save_timer = QTimer(self)
+        self._config_save_timer.setSingleShot(True)
+        self._config_save_timer.setInterval(self.CONFIG_SAVE_DELAY_MS)
+        self._config_save_timer.timeout.connect(self._flush_configs)
+
+        # Debounced "unsaved edits" handling for the rarity tables
+        self._dirty_timer = QTimer(self)
+        self._dirty_timer.setSingleShot(True)
+        self._dirty_timer.setInterval(self.MAPPING_DIRTY_DELAY_MS)
+        self._dirty_timer.timeout.connect(self._flush_mapping_changes)
+        self._mapping_dirty = False
 
         # UI state
         self.active_config_name = None
-        self.rarity_spinboxes = {}     # Trait rarity editors { "Layer:Trait": QSpinBox }
-        self.layer_rarity_spin = {}    # Layer rarity editors { "Layer": QSpinBox }
-
-        # Build UI
+        self._last_config_names = None   # names the config widgets were last filled with
+        self._last_map_key = None        # (source config, mapping set) the Mappings tab shows
+        self._inc_pairs = set()          # (a, b) pairs currently in inc_list / exc_list
+        self._exc_pairs = set()
+        self._last_browse_dir = None     # start folder for the next directory picker
+        # Configs-tab editor lists (widgets are views over these)
+        self._layer_order = []
+        self._excluded_layers = []
+        self._attached_mappings = []
+        # Rarity values live in the table models ({key: value} via as_dict())
+        self.layer_rarity_model = TraitRarityModel(["Layer", "Rarity %"])
+        self.trait_rarity_model = TraitRarityModel(["Layer", "Trait", "Rarity %"])
+        for model in (self.layer_rarity_model, self.trait_rarity_model):
+            model.dataChanged.connect(self._mark_dirty)
+
+        # Build UI: only the Configs tab up front, the rest on first visit
         layout = QVBoxLayout()
         self.tabs = QTabWidget()
         self.tabs.addTab(self.build_configs_tab(), "Configs (Layer Order)")
-        self.tabs.addTab(self.build_mappings_tab(), "Trait Mappings")
-        self.tabs.addTab(self.build_manager_tab(), "Config Manager")
-        self.tabs.addTab(self.build_generation_tab(), "Generate NFTs")
+        self.tabs.addTab(QWidget(), "Trait Mappings")
+        self.tabs.addTab(QWidget(), "Config Manager")
+        self.tabs.addTab(QWidget(), "Generate NFTs")
+        self._tab_builders = {
+            1: self.build_mappings_tab,
+            2: self.build_manager_tab,
+            3: self.build_generation_tab,
+        }
+        self.tabs.currentChanged.connect(self._on_tab_changed)
         layout.addWidget(self.tabs)
         self.setLayout(layout)
 
         # Initial refresh
         self.refresh_config_lists()
 
+    def _on_tab_changed(self, index):
+        builder = self._tab_builders.pop(index, None)
+        if builder is None:
+            return
+        placeholder = self.tabs.widget(index)
+        title = self.tabs.tabText(index)
+        built = builder()
+        self.tabs.blockSignals(True)
+        try:
+            self.tabs.removeTab(index)
+            self.tabs.insertTab(index, built, title)
+            self.tabs.setCurrentIndex(index)
+        finally:
+            self.tabs.blockSignals(False)
+        placeholder.deleteLater()
+        self._fill_built_tab(index)
+
+    def _fill_built_tab(self, index):
+        """
+        Populate the config lists/combos of the tab just built at index.
+        Other tabs are left alone, so unsaved rarity edits survive; only
+        building the Mappings tab itself loads its tables.
+        """
+        names = self._sorted_config_names
+        if index == 1:
+            self._refill(self.map_attach_target, names, keep_current=True)
+            self._refill(self.map_source_config, names, keep_current=True)
+            self.map_reload_from_config(force=True)
+        elif index == 2:
+            self._refill(self.config_list, names, keep_current=True)
+        elif index == 3:
+            self._refill(self.gen_config_list, names, keep_current=True)
+
+    def _schedule_config_save(self):
+        # self.configs is authoritative in memory; the file catches up shortly.
+        self._config_save_timer.start()
+
+    def _flush_configs(self):
+        self._config_save_timer.stop()
+        save_json(self.saved_configs_path, self.configs)
+
+    def _mark_dirty(self, *_args):
+        # one restart per edit; _flush_mapping_changes runs once per burst
+        self._dirty_timer.start()
+
+    def _flush_mapping_changes(self):
+        self._dirty_timer.stop()
+        self._set_mapping_dirty(True)
+
+    def _set_mapping_dirty(self, dirty):
+        if dirty == self._mapping_dirty:
+            return
+        self._mapping_dirty = dirty
+        if hasattr(self, "btn_save_map"):
+            self.btn_save_map.setText("Save/Update Mapping Set" + (" *" if dirty else ""))
+
+    def closeEvent(self, event):
+        if self._config_save_timer.isActive():
+            self._flush_configs()
+        super().closeEvent(event)
+
     # =========================================================
     # TAB: Configs (Layer Order + metadata + size + dirs + excluded layers)
     # =========================================================
@@ -235,6 +589,19 @@ class NFTGeneratorGUI(QWidget):
         self.size_h = QSpinBox(); self.size_h.setRange(64, 8192); self.size_h.setValue(1280)
         size_row.addWidget(QLabel("Width")); size_row.addWidget(self.size_w)
         size_row.addWidget(QLabel("Height")); size_row.addWidget(self.size_h)
+        self.resample_input = QComboBox(); self.resample_input.addItems(RESAMPLE_NAMES)
+        size_row.addWidget(QLabel("Resample")); size_row.addWidget(self.resample_input)
+
+        format_row = QHBoxLayout()
+        self.image_format_input = QComboBox(); self.image_format_input.addItems(IMAGE_FORMATS)
+        self.png_level_input = QSpinBox(); self.png_level_input.setRange(0, 9); self.png_level_input.setValue(1)
+        format_row.addWidget(QLabel("Format")); format_row.addWidget(self.image_format_input)
+        format_row.addWidget(QLabel("PNG Compression (0-9)")); format_row.addWidget(self.png_level_input)
+        self.seed_input = QLineEdit(); self.seed_input.setPlaceholderText("random")
+        format_row.addWidget(QLabel("Seed")); format_row.addWidget(self.seed_input)
+        self.metadata_per_file_input = QCheckBox("Per-file metadata (<n>.json)")
+        self.metadata_per_file_input.setToolTip("Legacy layout; otherwise all metadata goes to metadata.jsonl")
+        format_row.addWidget(self.metadata_per_file_input)
 
         # Mapping sets attached to this config
         self.cfg_mapping_sets_list = QListWidget()
@@ -244,6 +611,7 @@ class NFTGeneratorGUI(QWidget):
 
         right.addWidget(QLabel("Output Size"))
         right.addLayout(size_row)
+        right.addLayout(format_row)
         right.addWidget(QLabel("Attached Mapping Sets"))
         right.addWidget(self.cfg_mapping_sets_list, 1)
         right.addWidget(btn_remove_ms)
@@ -274,83 +642,194 @@ class NFTGeneratorGUI(QWidget):
         return tab
 
     # --- Config Tab Actions ---
+    def _browse_dir(self, caption):
+        # Start where the user last browsed so the dialog doesn't re-enumerate from scratch
+        folder = QFileDialog.getExistingDirectory(
+            self, caption, self._last_browse_dir or os.path.expanduser("~")
+        )
+        if folder:
+            self._last_browse_dir = folder
+        return folder
+
     def cfg_browse_layers_dir(self):
-        folder = QFileDialog.getExistingDirectory(self, "Select Layers Directory")
+        folder = self._browse_dir("Select Layers Directory")
         if not folder:
             return
         self.cfg_layers_dir.setText(folder)
         self.cfg_reload_layers()
 
     def cfg_browse_output_dir(self):
-        folder = QFileDialog.getExistingDirectory(self, "Select Output Directory")
+        folder = self._browse_dir("Select Output Directory")
         if folder:
             self.cfg_output_dir.setText(folder)
 
-    def cfg_reload_layers(self):
-        self.available_layers.clear()
-        self.layer_order.clear()
-        self.excluded_available_layers.clear()
-        self.excluded_layers.clear()
+    @staticmethod
+    def _refill(widget, items, keep_current=False):
+        """
+        Replace a list/combo's items with repaints and signals held off.
+        keep_current re-selects the previously current entry by text, if still present.
+        """
+        is_combo = isinstance(widget, QComboBox)
+        if is_combo:
+            current = widget.currentText()
+        else:
+            current = widget.currentItem().text() if widget.currentItem() else ""
+        widget.setUpdatesEnabled(False)
+        try:
+            with QSignalBlocker(widget):
+                widget.clear()
+                widget.addItems(items)
+                if keep_current and current:
+                    if is_combo:
+                        i = widget.findText(current)
+                        if i >= 0:
+                            widget.setCurrentIndex(i)
+                    else:
+                        found = widget.findItems(current, Qt.MatchExactly)
+                        if found:
+                            widget.setCurrentItem(found[0])
+        finally:
+            widget.setUpdatesEnabled(True)
+
+    @staticmethod
+    def _dir_stamp(path):
+        # mtime alone misses changes within one tick on coarse-timestamp
+        # filesystems; inode and size catch some of those
+        st = os.stat(path)
+        return [st.st_mtime_ns, st.st_ino, st.st_size]
+
+    def _scan_layers_cached(self, layers_dir, force=False):
+        """{layer: [png file, ...]} for layers_dir, cached on disk.
+
+        The entry is keyed by (mtime_ns, inode, size) of the layers dir and
+        of each layer folder, so adding/removing a layer or a trait file
+        invalidates it. force=True (an explicit reload) always rescans.
+        """
+        key = os.path.abspath(layers_dir)
+        hit = self._layer_tree_cache.get(key)
+        if hit is not None and not force:
+            try:
+                stamp = [self._dir_stamp(layers_dir)] + [
+                    self._dir_stamp(os.path.join(layers_dir, l)) for l in hit["tree"]
+                ]
+            except OSError:
+                stamp = None
+            if stamp == hit.get("stamp"):
+                return hit["tree"]
+
+        stamp = [self._dir_stamp(layers_dir)]
+        with os.scandir(layers_dir) as it:
+            layer_entries = sorted((e for e in it if e.is_dir() and not e.name.startswith(".")), key=lambda e: e.name)
+        tree = {}
+        for e in layer_entries:
+            stamp.append(self._dir_stamp(e.path))
+            with os.scandir(e.path) as it:
+                tree[e.name] = sorted(f.name for f in it if f.is_file() and f.name.lower().endswith(".png"))
+        self._layer_tree_cache[key] = {"stamp": stamp, "tree": tree}
+        save_json(self.layer_cache_path, self._layer_tree_cache)
+        return tree
+
+    @staticmethod
+    def _pair_item(a, b, sep):
+        """List entry showing "A <sep> B" that carries the (a, b) pair itself."""
+        it = QListWidgetItem(f"{a} {sep} {b}")
+        it.setData(Qt.UserRole, (a, b))
+        return it
+
+    def _refill_pairs(self, widget, pairs, sep):
+        """Fill a pair list, dropping repeats; returns the set of pairs shown."""
+        self._refill(widget, [])
+        seen = set()
+        widget.setUpdatesEnabled(False)
+        try:
+            for a, b in pairs:
+                if (a, b) in seen:
+                    continue
+                seen.add((a, b))
+                widget.addItem(self._pair_item(a, b, sep))
+        finally:
+            widget.setUpdatesEnabled(True)
+        return seen
 
+    @staticmethod
+    def _collect_pairs(widget):
+        return [list(widget.item(i).data(Qt.UserRole)) for i in range(widget.count())]
+
+    def cfg_reload_layers(self):
         layers_dir = self.cfg_layers_dir.text().strip()
+        layers = []
+        if layers_dir and os.path.isdir(layers_dir):
+            # an explicit reload: rescan even if the cached stamps still match
+            layers = list(self._scan_layers_cached(layers_dir, force=True))
+        self._refill(self.available_layers, layers)
+        self._layer_order = []
+        self._refill(self.layer_order, self._layer_order)
+        self._refill(self.excluded_available_layers, layers)
+        self._excluded_layers = []
+        self._refill(self.excluded_layers, self._excluded_layers)
         if not layers_dir or not os.path.isdir(layers_dir):
             QMessageBox.warning(self, "Error", "Please choose a valid Layers Dir.")
-            return
-        layers = [l for l in sorted(os.listdir(layers_dir)) if os.path.isdir(os.path.join(layers_dir, l))]
-        for l in layers:
-            self.available_layers.addItem(l)
-            self.excluded_available_layers.addItem(l)
+
+    # The _layer_order / _excluded_layers / _attached_mappings lists are
+    # authoritative; the list widgets mirror them and are never read back.
+    @staticmethod
+    def _take_selected(widget, items):
+        """Remove the selected rows from both the widget and its backing list."""
+        for r in sorted((widget.row(it) for it in widget.selectedItems()), reverse=True):
+            widget.takeItem(r)
+            del items[r]
 
     def cfg_add_layers_to_order(self):
-        for item in self.available_layers.selectedItems():
-            existing = [self.layer_order.item(i).text() for i in range(self.layer_order.count())]
-            if item.text() not in existing:
-                self.layer_order.addItem(item.text())
+        existing = set(self._layer_order)
+        new = [it.text() for it in self.available_layers.selectedItems() if it.text() not in existing]
+        self._layer_order.extend(new)
+        self.layer_order.addItems(new)
 
     def cfg_remove_layers_from_order(self):
-        for item in self.layer_order.selectedItems():
-            self.layer_order.takeItem(self.layer_order.row(item))
+        self._take_selected(self.layer_order, self._layer_order)
 
     def cfg_move_layer_up(self):
         rows = sorted([self.layer_order.row(i) for i in self.layer_order.selectedItems()])
+        order = self._layer_order
         for r in rows:
             if r <= 0:
                 continue
             it = self.layer_order.takeItem(r)
             self.layer_order.insertItem(r - 1, it)
             self.layer_order.setCurrentItem(it)
+            order[r - 1], order[r] = order[r], order[r - 1]
 
     def cfg_move_layer_down(self):
         rows = sorted([self.layer_order.row(i) for i in self.layer_order.selectedItems()], reverse=True)
+        order = self._layer_order
         for r in rows:
             if r >= self.layer_order.count() - 1:
                 continue
             it = self.layer_order.takeItem(r)
             self.layer_order.insertItem(r + 1, it)
             self.layer_order.setCurrentItem(it)
+            order[r + 1], order[r] = order[r], order[r + 1]
 
     def cfg_exclude_layers(self):
-        for it in self.excluded_available_layers.selectedItems():
-            existing = [self.excluded_layers.item(i).text() for i in range(self.excluded_layers.count())]
-            if it.text() not in existing:
-                self.excluded_layers.addItem(it.text())
+        existing = set(self._excluded_layers)
+        new = [it.text() for it in self.excluded_available_layers.selectedItems() if it.text() not in existing]
+        self._excluded_layers.extend(new)
+        self.excluded_layers.addItems(new)
 
     def cfg_include_layers(self):
-        for it in self.excluded_layers.selectedItems():
-            self.excluded_layers.takeItem(self.excluded_layers.row(it))
+        self._take_selected(self.excluded_layers, self._excluded_layers)
 
     def cfg_collect_layer_order(self):
-        return [self.layer_order.item(i).text() for i in range(self.layer_order.count())]
+        return list(self._layer_order)
 
     def cfg_collect_excluded_layers(self):
-        return [self.excluded_layers.item(i).text() for i in range(self.excluded_layers.count())]
+        return list(self._excluded_layers)
 
     def cfg_collect_attached_mappings(self):
-        return [self.cfg_mapping_sets_list.item(i).text() for i in range(self.cfg_mapping_sets_list.count())]
+        return list(self._attached_mappings)
 
     def cfg_remove_mapping_sets(self):
-        for it in self.cfg_mapping_sets_list.selectedItems():
-            self.cfg_mapping_sets_list.takeItem(self.cfg_mapping_sets_list.row(it))
+        self._take_selected(self.cfg_mapping_sets_list, self._attached_mappings)
 
     def cfg_save_config(self):
         name = self.cfg_name_input.text().strip()
@@ -368,13 +847,21 @@ class NFTGeneratorGUI(QWidget):
 
         layer_order = self.cfg_collect_layer_order()
         if not layer_order:
-            # default to discovered sorted order
-            for layer in sorted(os.listdir(layers_dir)):
-                if os.path.isdir(os.path.join(layers_dir, layer)):
-                    layer_order.append(layer)
+            # default to discovered sorted order (usually already cached by the layer reload)
+            layer_order = list(self._scan_layers_cached(layers_dir))
 
         excluded_layers = self.cfg_collect_excluded_layers()
 
+        seed_txt = self.seed_input.text().strip()
+        seed = None
+        if seed_txt:
+            # isdecimal() rejects "²" and the like that int() can't parse;
+            # the bound keeps the seed within what JSON (orjson) can store.
+            seed = int(seed_txt) if seed_txt.isdecimal() else -1
+            if not 0 <= seed < 2 ** 63:
+                QMessageBox.warning(self, "Error", "Seed must be a whole number from 0 to 2^63 - 1 (or blank for random).")
+                return
+
         config_obj = {
             "layers_dir": layers_dir,
             "output_dir": output_dir,
@@ -386,12 +873,20 @@ class NFTGeneratorGUI(QWidget):
                 "description": self.coll_desc_input.toPlainText().strip() or "",
             },
             "size": {"width": self.size_w.value(), "height": self.size_h.value()},
+            "resample": self.resample_input.currentText(),
+            "image_format": self.image_format_input.currentText(),
+            "png_compress_level": self.png_level_input.value(),
+            "seed": seed,
+            "metadata_per_file": self.metadata_per_file_input.isChecked(),
         }
 
+        if name not in self.configs:
+            bisect.insort(self._sorted_config_names, name)
         self.configs[name] = config_obj
-        save_json(self.saved_configs_path, self.configs)
+        self._schedule_config_save()
         self.active_config_name = name
-        self.refresh_config_lists()
+        # force: the Mappings tab may be showing this config's (changed) layers
+        self.refresh_config_lists(force=True)
         QMessageBox.information(self, "Saved", f"Config '{name}' saved/updated.")
 
     def cfg_load_existing_into_editor(self):
@@ -412,21 +907,22 @@ class NFTGeneratorGUI(QWidget):
         size = cfg.get("size", {})
         self.size_w.setValue(int(size.get("width", 980)))
         self.size_h.setValue(int(size.get("height", 1280)))
+        self.resample_input.setCurrentText(cfg.get("resample", "lanczos"))
+        self.image_format_input.setCurrentText(cfg.get("image_format", "png"))
+        self.png_level_input.setValue(int(cfg.get("png_compress_level", 1)))
+        seed = cfg.get("seed")
+        self.seed_input.setText("" if seed is None else str(seed))
+        self.metadata_per_file_input.setChecked(bool(cfg.get("metadata_per_file", False)))
 
         # Reload lists
         self.cfg_reload_layers()
-        # Order
-        self.layer_order.clear()
-        for layer in cfg.get("layer_order", []):
-            self.layer_order.addItem(layer)
-        # Excluded
-        self.excluded_layers.clear()
-        for layer in cfg.get("excluded_layers", []):
-            self.excluded_layers.addItem(layer)
-        # Mapping sets
-        self.cfg_mapping_sets_list.clear()
-        for ms in cfg.get("mapping_sets", []):
-            self.cfg_mapping_sets_list.addItem(ms)
+        # Order / Excluded / Mapping sets
+        self._layer_order = list(cfg.get("layer_order", []))
+        self._excluded_layers = list(cfg.get("excluded_layers", []))
+        self._attached_mappings = list(cfg.get("mapping_sets", []))
+        self._refill(self.layer_order, self._layer_order)
+        self._refill(self.excluded_layers, self._excluded_layers)
+        self._refill(self.cfg_mapping_sets_list, self._attached_mappings)
 
         QMessageBox.information(self, "Loaded", f"Loaded '{name}' into editor.")
 
@@ -451,18 +947,14 @@ class NFTGeneratorGUI(QWidget):
         # Layer rarities (folder-level)
         layer_box = QGroupBox("Layer (Folder) Rarities %")
         layer_layout = QVBoxLayout()
-        self.layer_rarity_table = QTableWidget(0, 2)
-        self.layer_rarity_table.setHorizontalHeaderLabels(["Layer", "Rarity %"])
-        self.layer_rarity_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.layer_rarity_table = self._make_rarity_view(self.layer_rarity_model)
         layer_layout.addWidget(self.layer_rarity_table)
         layer_box.setLayout(layer_layout)
 
         # Trait rarities
         trait_box = QGroupBox("Trait Rarities %")
         trait_layout = QVBoxLayout()
-        self.map_trait_table = QTableWidget(0, 3)
-        self.map_trait_table.setHorizontalHeaderLabels(["Layer", "Trait", "Rarity %"])
-        self.map_trait_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.map_trait_table = self._make_rarity_view(self.trait_rarity_model)
         trait_layout.addWidget(self.map_trait_table)
         trait_box.setLayout(trait_layout)
 
@@ -508,7 +1000,7 @@ class NFTGeneratorGUI(QWidget):
 
         # Actions row
         actions = QHBoxLayout()
-        btn_save_map = QPushButton("Save/Update Mapping Set")
+        self.btn_save_map = btn_save_map = QPushButton("Save/Update Mapping Set")
         btn_save_map.clicked.connect(self.map_save_set)
         self.map_attach_target = QComboBox()
         btn_attach_map = QPushButton("Add Mapping to Config")
@@ -528,82 +1020,54 @@ class NFTGeneratorGUI(QWidget):
         tab.setLayout(layout)
         return tab
 
-    # --- Mappings Tab Actions ---
-    def map_reload_from_config(self):
-        # Clear tables/dropdowns
-        self.layer_rarity_table.setRowCount(0)
-        self.map_trait_table.setRowCount(0)
-        self.rarity_spinboxes.clear()
-        self.layer_rarity_spin.clear()
-        for cb in (self.inc_a, self.inc_b, self.exc_a, self.exc_b):
-            cb.clear()
-        self.inc_list.clear()
-        self.exc_list.clear()
+    def _make_rarity_view(self, model):
+        view = QTableView()
+        view.setModel(model)
+        view.setItemDelegateForColumn(model.value_column, SpinBoxDelegate(view))
+        view.setEditTriggers(QAbstractItemView.AllEditTriggers)
+        view.verticalHeader().setVisible(False)
+        view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        return view
 
-        cfg_name = self.map_source_config.currentText().strip()
-        cfg = self.configs.get(cfg_name)
-        if not cfg:
-            return
-        layers_dir = cfg.get("layers_dir", "")
-        if not layers_dir or not os.path.isdir(layers_dir):
+    # --- Mappings Tab Actions ---
+    def map_reload_from_config(self, *_args, force=False):
+        # Same source config + mapping set as last time: tables are already current
+        key = (self.map_source_config.currentText().strip(), self.map_set_name.text().strip())
+        if not force and key == self._last_map_key:
             return
+        self._last_map_key = key
+        cfg_name, ms_name = key
 
-        # Load layers
-        layers = [l for l in sorted(os.listdir(layers_dir)) if os.path.isdir(os.path.join(layers_dir, l))]
-
-        # Layer rarities table
-        for layer in layers:
-            row = self.layer_rarity_table.rowCount()
-            self.layer_rarity_table.insertRow(row)
-            self.layer_rarity_table.setItem(row, 0, QTableWidgetItem(layer))
-            sp = QSpinBox(); sp.setRange(0, 100); sp.setValue(100)
-            self.layer_rarity_table.setCellWidget(row, 1, sp)
-            self.layer_rarity_spin[layer] = sp
-
-        # Traits table + pair dropdowns
+        # Load layers (and their trait files) from the cached tree;
+        # an unknown config or missing layers dir leaves everything empty
+        cfg = self.configs.get(cfg_name) or {}
+        layers_dir = cfg.get("layers_dir", "")
+        tree, ms = {}, {}
+        if layers_dir and os.path.isdir(layers_dir):
+            tree = self._scan_layers_cached(layers_dir)
+            # If mapping set exists, preload its values
+            ms = self.mappings.get(ms_name, {}) if ms_name else {}
+
+        # First pass: flat row lists, so each table is reset exactly once
+        layers = list(tree)
+        trait_rows, trait_keys = [], []
         for layer in layers:
-            lp = os.path.join(layers_dir, layer)
-            files = [f for f in sorted(os.listdir(lp)) if f.lower().endswith(".png")]
-            for f in files:
+            for f in tree[layer]:
                 trait = os.path.splitext(f)[0]
-                key = f"{layer}:{trait}"
-                r = self.map_trait_table.rowCount()
-                self.map_trait_table.insertRow(r)
-                self.map_trait_table.setItem(r, 0, QTableWidgetItem(layer))
-                self.map_trait_table.setItem(r, 1, QTableWidgetItem(trait))
-                sp = QSpinBox(); sp.setRange(0, 100); sp.setValue(100)
-                self.map_trait_table.setCellWidget(r, 2, sp)
-                self.rarity_spinboxes[key] = sp
-
-                # for inclusion/exclusion dropdowns
-                self.inc_a.addItem(key); self.inc_b.addItem(key)
-                self.exc_a.addItem(key); self.exc_b.addItem(key)
-
-        # If mapping set exists, preload values
-        ms_name = self.map_set_name.text().strip()
-        if ms_name and ms_name in self.mappings:
-            ms = self.mappings[ms_name]
-            # layer rarities
-            for layer, v in (ms.get("layer_rarities", {}) or {}).items():
-                sp = self.layer_rarity_spin.get(layer)
-                if sp is not None:
-                    try:
-                        sp.setValue(int(v))
-                    except Exception:
-                        pass
-            # trait rarities
-            for k, v in (ms.get("rarities", {}) or {}).items():
-                sp = self.rarity_spinboxes.get(k)
-                if sp is not None:
-                    try:
-                        sp.setValue(int(v))
-                    except Exception:
-                        pass
-            # inclusion/exclusion
-            for a, b in (ms.get("include_pairs", []) or []):
-                self.inc_list.addItem(f"{a} ⇒ {b}")
-            for a, b in (ms.get("exclude_pairs", []) or []):
-                self.exc_list.addItem(f"{a} ✕ {b}")
+                trait_rows.append((layer, trait))
+                trait_keys.append(f"{layer}:{trait}")
+
+        # Layer + trait rarity tables (a reload discards unsaved edits)
+        self._dirty_timer.stop()
+        self._set_mapping_dirty(False)
+        self.layer_rarity_model.reset_rows([(layer,) for layer in layers], layers, ms.get("layer_rarities"))
+        self.trait_rarity_model.reset_rows(trait_rows, trait_keys, ms.get("rarities"))
+
+        # Pair dropdowns + inclusion/exclusion lists
+        for cb in (self.inc_a, self.inc_b, self.exc_a, self.exc_b):
+            self._refill(cb, trait_keys)
+        self._inc_pairs = self._refill_pairs(self.inc_list, ms.get("include_pairs", []) or [], "⇒")
+        self._exc_pairs = self._refill_pairs(self.exc_list, ms.get("exclude_pairs", []) or [], "✕")
 
     def map_add_inclusion(self):
         a = self.inc_a.currentText().strip()
@@ -611,10 +1075,14 @@ class NFTGeneratorGUI(QWidget):
         if not a or not b or a == b:
             QMessageBox.warning(self, "Error", "Pick two different traits for inclusion.")
             return
-        self.inc_list.addItem(f"{a} ⇒ {b}")
+        if (a, b) in self._inc_pairs:
+            return
+        self._inc_pairs.add((a, b))
+        self.inc_list.addItem(self._pair_item(a, b, "⇒"))
 
     def map_remove_inclusion(self):
         for it in self.inc_list.selectedItems():
+            self._inc_pairs.discard(tuple(it.data(Qt.UserRole)))
             self.inc_list.takeItem(self.inc_list.row(it))
 
     def map_add_exclusion(self):
@@ -623,10 +1091,15 @@ class NFTGeneratorGUI(QWidget):
         if not a or not b or a == b:
             QMessageBox.warning(self, "Error", "Pick two different traits for exclusion.")
             return
-        self.exc_list.addItem(f"{a} ✕ {b}")
+        # exclusion is symmetric, so B ✕ A duplicates A ✕ B
+        if (a, b) in self._exc_pairs or (b, a) in self._exc_pairs:
+            return
+        self._exc_pairs.add((a, b))
+        self.exc_list.addItem(self._pair_item(a, b, "✕"))
 
     def map_remove_exclusion(self):
         for it in self.exc_list.selectedItems():
+            self._exc_pairs.discard(tuple(it.data(Qt.UserRole)))
             self.exc_list.takeItem(self.exc_list.row(it))
 
     def map_save_set(self):
@@ -635,30 +1108,13 @@ class NFTGeneratorGUI(QWidget):
             QMessageBox.warning(self, "Error", "Provide a Mapping Set name.")
             return
 
-        # Collect layer rarities
-        layer_rarities = {}
-        for layer, sp in self.layer_rarity_spin.items():
-            layer_rarities[layer] = sp.value()
-
-        # Collect trait rarities
-        rarities = {}
-        for key, sp in self.rarity_spinboxes.items():
-            rarities[key] = sp.value()
-
-        # Collect pairs
-        include_pairs = []
-        for i in range(self.inc_list.count()):
-            txt = self.inc_list.item(i).text()
-            if "⇒" in txt:
-                a, b = txt.split("⇒")
-                include_pairs.append([a.strip(), b.strip()])
-
-        exclude_pairs = []
-        for i in range(self.exc_list.count()):
-            txt = self.exc_list.item(i).text()
-            if "✕" in txt:
-                a, b = txt.split("✕")
-                exclude_pairs.append([a.strip(), b.strip()])
+        # Collect layer/trait rarities straight from the table models
+        layer_rarities = self.layer_rarity_model.as_dict()
+        rarities = self.trait_rarity_model.as_dict()
+
+        # Collect pairs (stored on each item, no label parsing)
+        include_pairs = self._collect_pairs(self.inc_list)
+        exclude_pairs = self._collect_pairs(self.exc_list)
 
         self.mappings[name] = {
             "layer_rarities": layer_rarities,
@@ -667,6 +1123,8 @@ class NFTGeneratorGUI(QWidget):
             "exclude_pairs": exclude_pairs
         }
         save_json(self.saved_mappings_path, self.mappings)
+        self._dirty_timer.stop()
+        self._set_mapping_dirty(False)
         self.refresh_config_lists()
         QMessageBox.information(self, "Saved", f"Mapping Set '{name}' saved/updated.")
 
@@ -685,9 +1143,11 @@ class NFTGeneratorGUI(QWidget):
             ms_list.append(ms_name)
             cfg["mapping_sets"] = ms_list
             self.configs[target_cfg] = cfg
-            save_json(self.saved_configs_path, self.configs)
+            self._schedule_config_save()
             if self.active_config_name == target_cfg:
-                self.cfg_mapping_sets_list.addItem(ms_name)
+                if ms_name not in self._attached_mappings:
+                    self._attached_mappings.append(ms_name)
+                    self.cfg_mapping_sets_list.addItem(ms_name)
             QMessageBox.information(self, "Attached", f"'{ms_name}' added to config '{target_cfg}'.")
         else:
             QMessageBox.information(self, "Info", f"'{ms_name}' is already attached to '{target_cfg}'.")
@@ -727,9 +1187,12 @@ class NFTGeneratorGUI(QWidget):
             self.active_config_name = it.text()
 
     def reload_from_disk(self):
+        if self._config_save_timer.isActive():
+            self._flush_configs()
         self.configs = load_json(self.saved_configs_path, {})
         self.mappings = load_json(self.saved_mappings_path, {})
-        self.refresh_config_lists()
+        self._sorted_config_names = sorted(self.configs.keys())
+        self.refresh_config_lists(force=True)
         QMessageBox.information(self, "Reloaded", "Configs and Mappings reloaded from disk.")
 
     def master_reset(self):
@@ -747,55 +1210,66 @@ class NFTGeneratorGUI(QWidget):
         if hasattr(self, "log_window"):
             self.log_window.clear()
 
-        # 2) Delete config JSON files
+        # 2) Empty the config JSON files (dropping any pending debounced save);
+        #    save_json replaces each atomically, so no delete/recreate cycle
+        self._config_save_timer.stop()
         try:
-            if os.path.isfile(self.saved_configs_path):
-                os.remove(self.saved_configs_path)
-            if os.path.isfile(self.saved_mappings_path):
-                os.remove(self.saved_mappings_path)
-        except Exception:
+            save_json(self.saved_configs_path, {})
+            save_json(self.saved_mappings_path, {})
+        except OSError:
             pass
 
-        # 3) Remove generated outputs for each known config
+        # 3) Remove generated outputs for each known config, folders in parallel
+        paths = []
         for cfg in self.configs.values():
             out = cfg.get("output_dir")
             if out and os.path.isdir(out):
                 for sub in ("images", "metadata"):
                     p = os.path.join(out, sub)
-                    if os.path.isdir(p):
-                        try:
-                            shutil.rmtree(p)
-                        except Exception:
-                            pass
+                    if os.path.isdir(p) and p not in paths:
+                        paths.append(p)
+        if paths:
+            progress = QProgressDialog("Removing generated outputs...", None, 0, len(paths), self)
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(500)
+            with ThreadPoolExecutor(max_workers=min(self.RESET_THREADS, len(paths))) as ex:
+                futures = [ex.submit(shutil.rmtree, p, ignore_errors=True) for p in paths]
+                for i, _ in enumerate(as_completed(futures), 1):
+                    progress.setValue(i)
+                    QApplication.processEvents()
+            progress.close()
 
         # Reset in-memory
         self.configs = {}
+        self._sorted_config_names = []
         self.mappings = {}
         self.active_config_name = None
         self.refresh_config_lists()
 
         QMessageBox.information(self, "Reset Complete", "All configs, mappings, and generated outputs have been cleared.")
 
-    def refresh_config_lists(self):
+    def refresh_config_lists(self, force=False):
+        """
+        Repopulate every config list/combo. Skipped when the set of config
+        names is unchanged, unless force=True (config contents changed).
+        """
+        names = tuple(self._sorted_config_names)
+        if not force and names == self._last_config_names:
+            return
+        self._last_config_names = names
         # Manager list
         if hasattr(self, "config_list"):
-            self.config_list.clear()
-            for name in sorted(self.configs.keys()):
-                self.config_list.addItem(name)
+            self._refill(self.config_list, names, keep_current=True)
         # Generation list
         if hasattr(self, "gen_config_list"):
-            self.gen_config_list.clear()
-            for name in sorted(self.configs.keys()):
-                self.gen_config_list.addItem(name)
+            self._refill(self.gen_config_list, names, keep_current=True)
         # Mappings tab: source config & attach target
-        if hasattr(self, "map_source_config"):
-            self.map_source_config.clear()
-            for name in sorted(self.configs.keys()):
-                self.map_source_config.addItem(name)
         if hasattr(self, "map_attach_target"):
-            self.map_attach_target.clear()
-            for name in sorted(self.configs.keys()):
-                self.map_attach_target.addItem(name)
+            self._refill(self.map_attach_target, names, keep_current=True)
+        if hasattr(self, "map_source_config"):
+            self._refill(self.map_source_config, names, keep_current=True)
+            # signals were blocked during the refill; reload the mapping tab once
+            self.map_reload_from_config(force=force)
 
     # =========================================================
     # TAB: Generate NFTs (logging + stats)
@@ -810,7 +1284,7 @@ class NFTGeneratorGUI(QWidget):
         add_btn = QPushButton("Add Config to Queue (log only)")
         add_btn.clicked.connect(self.add_to_queue)
 
-        self.log_window = QTextEdit(); self.log_window.setReadOnly(True)
+        self.log_window = QPlainTextEdit(); self.log_window.setReadOnly(True)
         self.progress_bar = QProgressBar()
         self.stats_label = QLabel("Stats: waiting...")
 
@@ -838,10 +1312,10 @@ class NFTGeneratorGUI(QWidget):
             return
         name = it.text()
         qty = self.quantity_input.value()
-        self.log_window.append(f"📝 Queued: {name} x{qty}")
+        self.log_window.appendPlainText(f"📝 Queued: {name} x{qty}")
 
     def log(self, msg):
-        self.log_window.append(msg)
+        self.log_window.appendPlainText(msg)
 
     def update_progress(self, done, total):
         self.progress_bar.setMaximum(total)
@@ -883,46 +1357,47 @@ def _safe_log(cb, msg):
             pass
 
 
-def _weighted_choice(options, weights):
-    """
-    options: list[str] trait names
-    weights: list[int or float] same length
-    Returns one element from options chosen by weights.
-    If all weights are <= 0, falls back to uniform.
+def _collect_traits(layers_dir):
     """
-    total = sum(w for w in weights if w > 0)
-    if total <= 0:
-        return random.choice(options) if options else None
-    r = random.uniform(0, total)
-    upto = 0.0
-    for opt, w in zip(options, weights):
-        if w <= 0:
-            continue
-        if upto + w >= r:
-            return opt
-        upto += w
-    return options[-1] if options else None
+    Scan layers_dir once and return (traits, paths):
 
+      traits: { layer_name: [trait_name, ...] }
+      paths:  { layer_name: { name: absolute .png path } }
 
-def _collect_traits(layers_dir):
-    """
-    Return dict: { layer_name: [trait_name, ...] }
     Listing only .png files; trait_name is filename stem without extension.
+    paths keys every PNG by its lowercased stem (case-insensitive fallback)
+    and files named exactly "<trait>.png" also by their stem, so an exact
+    match wins: look up with trait first, then trait.lower().
     """
-    out = {}
+    traits = {}
+    paths = {}
     if not os.path.isdir(layers_dir):
-        return out
-    for layer in sorted(os.listdir(layers_dir)):
-        lp = os.path.join(layers_dir, layer)
-        if not os.path.isdir(lp):
+        return traits, paths
+    layers_dir = os.path.abspath(layers_dir)
+    # DirEntry.is_dir()/is_file() answer from the dirent type, no stat per entry
+    with os.scandir(layers_dir) as it:
+        layer_entries = sorted((e for e in it if e.is_dir() and not e.name.startswith(".")), key=lambda e: e.name)
+    for e in layer_entries:
+        with os.scandir(e.path) as it:
+            files = sorted((f.name, f.path) for f in it if f.is_file() and f.name.lower().endswith(".png"))
+        if not files:
             continue
-        traits = []
-        for f in sorted(os.listdir(lp)):
-            if f.lower().endswith(".png"):
-                traits.append(os.path.splitext(f)[0])
-        if traits:
-            out[layer] = traits
-    return out
+        traits[e.name] = [os.path.splitext(name)[0] for name, _ in files]
+        by_name = {}
+        for name, path in files:
+            by_name.setdefault(os.path.splitext(name)[0].lower(), path)
+        for name, path in files:
+            if name.endswith(".png"):
+                by_name[name[:-4]] = path
+        paths[e.name] = by_name
+    return traits, paths
+
+
+@functools.lru_cache(maxsize=8)
+def _load_saved_mappings(path, version):
+    """Parsed saved_mappings.json, cached per file version (mtime_ns, inode, size)."""
+    with open(path, "rb") as f:
+        return _json_loads(f.read())
 
 
 def _merge_mapping_sets(config, log_callback=None):
@@ -937,26 +1412,47 @@ def _merge_mapping_sets(config, log_callback=None):
         "include_pairs": [ ["LayerA:TraitA", "LayerB:TraitB"], ... ],
         "exclude_pairs": [ ["LayerA:TraitA", "LayerB:TraitB"], ... ],
       }
+
+    The result is cached while saved_mappings.json is unchanged and shared
+    between runs; callers must not mutate it.
+    """
+    mapping_sets = tuple(config.get("mapping_sets", []) or [])
+    mappings_path = os.path.join("configs", "saved_mappings.json")
+    try:
+        st = os.stat(mappings_path)
+        # save_json replaces the file, so a save changes the inode even where
+        # mtime is too coarse to tell two saves apart
+        version = (st.st_mtime_ns, st.st_ino, st.st_size)
+    except OSError:
+        version = None
+    try:
+        rules, warnings = _merge_cached(mappings_path, version, mapping_sets)
+    except Exception as e:
+        _safe_log(log_callback, f"⚠️ Could not read saved_mappings.json: {e}")
+        rules, warnings = _merge_cached(mappings_path, None, mapping_sets)
+    for msg in warnings:
+        _safe_log(log_callback, msg)
+    return rules
+
+
+@functools.lru_cache(maxsize=8)
+def _merge_cached(mappings_path, version, mapping_sets):
+    """
+    _merge_mapping_sets for one version of the mappings file (version None:
+    no file). Returns (rules, warnings) so cache hits still log warnings.
     """
     trait_rarities = {}
     layer_rarities = {}
     include_pairs = []
     exclude_pairs = []
+    warnings = []
 
-    mapping_sets = config.get("mapping_sets", []) or []
-    mappings_path = os.path.join("configs", "saved_mappings.json")
-    saved = {}
-    if os.path.isfile(mappings_path):
-        try:
-            with open(mappings_path, "r") as f:
-                saved = json.load(f)
-        except Exception as e:
-            _safe_log(log_callback, f"⚠️ Could not read saved_mappings.json: {e}")
+    saved = _load_saved_mappings(mappings_path, version) if version is not None else {}
 
     for name in mapping_sets:
         m = saved.get(name)
         if not m:
-            _safe_log(log_callback, f"⚠️ Mapping set '{name}' not found.")
+            warnings.append(f"⚠️ Mapping set '{name}' not found.")
             continue
 
         # trait rarities
@@ -981,25 +1477,590 @@ def _merge_mapping_sets(config, log_callback=None):
             if isinstance(p, list) and len(p) == 2:
                 exclude_pairs.append([p[0], p[1]])
 
-    return {
+    rules = {
         "trait_rarities": trait_rarities,
         "layer_rarities": layer_rarities,
         "include_pairs": include_pairs,
         "exclude_pairs": exclude_pairs,
     }
+    return rules, tuple(warnings)
+
+
+def _index_rules(rules, layer_order, options_by_layer):
+    """
+    Build per-run lookup tables from merged rules (see _merge_mapping_sets),
+    laid out by position in layer_order, so trait selection indexes lists
+    and does set lookups instead of scanning pair lists:
+
+      "has_exclusions":   True if any exclude pair is set
+      "include_by_src":   { "LayerA:TraitA": [(layer_b index, trait_b), ...] }
+      "include_by_layer": [ [("LayerA:TraitA", trait_b), ...] per layer ]
+      "layer_p":          [ chance (0-1) each layer is used ]
+      "layer_weights":    [ float64 trait rarities, per layer ]
+      "layer_exclusions": [ { key: int array of trait indices it excludes } ]
+      "layer_keys":       [ { trait: "Layer:Trait" } per layer ]
+
+    Keys are interned once here so selection never formats them. Lists keep
+    include_pairs order; pairs without a "Layer:Trait" form, or whose target
+    layer is not in layer_order, are dropped, as the selection loop always
+    ignored them.
+    """
+    layer_idx = {layer: i for i, layer in enumerate(layer_order)}
+
+    exclude_adj = {}
+    for a, b in rules["exclude_pairs"]:
+        a, b = sys.intern(a), sys.intern(b)
+        exclude_adj.setdefault(a, set()).add(b)
+        exclude_adj.setdefault(b, set()).add(a)
+
+    include_by_src = {}
+    include_by_layer = [[] for _ in layer_order]
+    for a, b in rules["include_pairs"]:
+        if ":" not in a or ":" not in b:
+            continue
+        lb, tb = b.split(":", 1)
+        lbi = layer_idx.get(lb)
+        if lbi is None:
+            continue
+        a = sys.intern(a)
+        include_by_src.setdefault(a, []).append((lbi, tb))
+        include_by_layer[lbi].append((a, tb))
+
+    layer_rarities = rules["layer_rarities"]
+    trait_rarities = rules["trait_rarities"]
+    layer_p = []
+    layer_weights = []
+    layer_exclusions = []
+    layer_keys = []
+    for layer, options in zip(layer_order, options_by_layer):
+        keys = {t: sys.intern(f"{layer}:{t}") for t in options}
+        layer_keys.append(keys)
+        layer_p.append(int(layer_rarities.get(layer, 100)) / 100.0)
+        layer_weights.append(np.array(
+            [max(int(trait_rarities.get(keys[t], 100)), 0) for t in options],
+            dtype=np.float64,
+        ))
+        by_key = {}
+        for i, t in enumerate(options):
+            for other in exclude_adj.get(keys[t], ()):
+                by_key.setdefault(other, []).append(i)
+        layer_exclusions.append({k: np.array(v, dtype=np.intp) for k, v in by_key.items()})
+
+    return {
+        "has_exclusions": bool(exclude_adj),
+        "include_by_src": include_by_src,
+        "include_by_layer": include_by_layer,
+        "layer_p": layer_p,
+        "layer_weights": layer_weights,
+        "layer_exclusions": layer_exclusions,
+        "layer_keys": layer_keys,
+    }
 
 
-def _is_excluded_by_pairs(candidate_key, selected_keys, exclude_pairs):
+def _es_choice(weights, blocked, rng):
+    """
+    Weighted pick of an index into weights, never one of blocked, using
+    Efraimidis-Spirakis keys: argmin of -log(U) / w. Zero weights and blocked
+    indices get +inf keys; if every viable weight is zero the pick is uniform
+    over the viable indices. Returns None when nothing is viable.
     """
-    Return True if candidate_key conflicts with any selected_keys via exclude_pairs.
+    n = len(weights)
+    with np.errstate(divide="ignore"):
+        keys = -np.log(rng.random(n)) / weights
+    keys[weights == 0] = np.inf
+    keys[blocked] = np.inf
+    best = int(np.argmin(keys))
+    if keys[best] != np.inf:
+        return best
+    viable = np.ones(n, dtype=bool)
+    viable[blocked] = False
+    viable = np.flatnonzero(viable)
+    if not len(viable):
+        return None
+    return int(viable[rng.integers(len(viable))])
+
+
+def _select_traits(layer_order, options_by_layer, rule_index, skip_rolls, picks,
+                   edition_index, rng, log_callback=None):
     """
-    if not exclude_pairs:
+    Pick one edition's traits, walking layer_order and applying layer
+    rarities, inclusion and exclusion rules (rule_index from _index_rules).
+
+    options_by_layer[i] lists the traits of layer_order[i]. skip_rolls/picks
+    are the pre-drawn per-layer layer-rarity rolls and default trait indices
+    (see run_generation); rng (a numpy Generator) is only used when
+    exclusions shrink a layer's options.
+
+    Returns a list aligned with layer_order: the chosen trait per layer, or
+    None where the layer was skipped.
+    """
+    layer_p = rule_index["layer_p"]
+    has_exclusions = rule_index["has_exclusions"]
+    layer_weights = rule_index["layer_weights"]
+    layer_exclusions = rule_index["layer_exclusions"]
+    include_by_src = rule_index["include_by_src"]
+    include_by_layer = rule_index["include_by_layer"]
+    layer_keys = rule_index["layer_keys"]
+
+    selected = [None] * len(layer_order)   # layer index -> trait
+    selected_keys = set()    # {"Layer:Trait", ...} for quick conflict checks
+    forced_selection = {}    # layer index -> trait (caused by include mappings)
+
+    for li, layer in enumerate(layer_order):
+        options = options_by_layer[li]
+        if not options:
+            continue
+
+        # Apply layer rarity (chance to skip a layer)
+        must_include = li in forced_selection  # inclusion map can force presence
+        rolls = skip_rolls[li]
+        if not must_include and rolls is not None and rolls[edition_index] > layer_p[li]:
+            # skip this layer entirely
+            continue
+
+        # Forced selection from inclusion pairs?
+        chosen_trait = forced_selection.get(li)
+
+        if chosen_trait is None:
+            # If any selected trait requires an inclusion for THIS layer,
+            # we restrict to the required trait (only mapping is used).
+            required_trait_for_layer = None
+            for a, tb in include_by_layer[li]:
+                # a requires layer:tb
+                if a in selected_keys:
+                    required_trait_for_layer = tb
+                    break
+
+            if required_trait_for_layer is not None:
+                if required_trait_for_layer in options:
+                    chosen_trait = required_trait_for_layer
+                else:
+                    _safe_log(
+                        log_callback,
+                        f"⚠️ Inclusion requires '{layer}:{required_trait_for_layer}', but not found; skipping layer."
+                    )
+                    # If mapping says only the mapped trait should be used, and it's missing, skip layer.
+                    continue
+
+        if chosen_trait is None and not has_exclusions:
+            # nothing can be excluded: use the pre-drawn pick
+            chosen_trait = options[picks[li]]
+
+        if chosen_trait is None:
+            # Weighted choice by trait rarities, minus excluded by pairs with already selected traits.
+            exclusions = layer_exclusions[li]
+            blocked = [exclusions[k] for k in selected_keys if k in exclusions]
+            if not blocked:
+                chosen_trait = options[picks[li]]
+            else:
+                pick = _es_choice(layer_weights[li], np.concatenate(blocked), rng)
+                if pick is None:
+                    # nothing compatible, skip layer
+                    continue
+                chosen_trait = options[pick]
+
+        # Register selection
+        selected[li] = chosen_trait
+        # forced inclusions may name traits that aren't on disk
+        key = layer_keys[li].get(chosen_trait) or f"{layer}:{chosen_trait}"
+        selected_keys.add(key)
+
+        # Handle inclusion chains: if selected key 'a' requires 'b', force it
+        for lbi, tb in include_by_src.get(key, ()):
+            # Only set forced if target layer hasn't been processed yet
+            if selected[lbi] is None:
+                forced_selection[lbi] = tb
+
+    return selected
+
+
+# Decoded traits kept per worker process; ~5 MB each at 980x1280 RGBA.
+TRAIT_CACHE_SIZE = 128
+
+# Decoded traits are also kept on disk, under
+# <layers_dir>/.cache/<w>x<h>-<resample>/<layer>/<trait>.rgba16, so reruns and
+# the other worker processes map them instead of decoding and resizing again.
+# Layout: int64 header [source mtime_ns, size, inode, top, left, h, w, opaque]
+# + h*w*4 uint16. The source triple catches a PNG replaced under the same mtime
+# (cp -p, archive extraction, FAT's 2 s resolution).
+TRAIT_DISK_CACHE = ".cache"
+_TRAIT_HEADER = 8
+
+
+def _trait_source_stamp(path):
+    st = os.stat(path)
+    # inode numbers can use all 64 bits; keep them within int64
+    return st.st_mtime_ns, st.st_size, st.st_ino & (2 ** 63 - 1)
+
+
+def _trait_cache_path(path, size, resample):
+    layer_dir, name = os.path.split(path)
+    layers_dir, layer = os.path.split(layer_dir)
+    return os.path.join(
+        layers_dir, TRAIT_DISK_CACHE, f"{size[0]}x{size[1]}-{int(resample)}",
+        layer, os.path.splitext(name)[0] + ".rgba16",
+    )
+
+
+def _read_cached_trait(cache_path, source):
+    """
+    Map a cached trait written by _write_cached_trait; None if unreadable or
+    stale (source is the PNG's _trait_source_stamp).
+    """
+    try:
+        header = np.fromfile(cache_path, dtype=np.int64, count=_TRAIT_HEADER)
+        if len(header) != _TRAIT_HEADER or tuple(int(v) for v in header[:3]) != source:
+            return None
+        top, left, h, w, opaque = (int(v) for v in header[3:])
+        if h == 0:
+            return (top, left), None, False
+        mm = np.memmap(cache_path, dtype=np.uint16, mode="r",
+                       offset=header.nbytes, shape=(h, w, 4))
+    except (OSError, ValueError):
+        return None
+    return (top, left), np.asarray(mm), bool(opaque)
+
+
+def _write_cached_trait(cache_path, source, offset, arr, opaque):
+    """
+    Atomically store a decoded trait. Returns False if it could not be
+    written (e.g. read-only layers); callers then keep the in-memory array.
+    """
+    h, w = arr.shape[:2] if arr is not None else (0, 0)
+    header = np.array([*source, offset[0], offset[1], h, w, int(opaque)], dtype=np.int64)
+    tmp = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(tmp, "wb") as f:
+            f.write(header.tobytes())
+            if arr is not None:
+                f.write(arr.tobytes())
+        os.replace(tmp, cache_path)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
         return False
-    for sk in selected_keys:
-        for a, b in exclude_pairs:
-            if (candidate_key == a and sk == b) or (candidate_key == b and sk == a):
-                return True
-    return False
+    return True
+
+
+@functools.lru_cache(maxsize=TRAIT_CACHE_SIZE)
+def _load_trait(path, size, resample=RESAMPLE):
+    """
+    Load a trait at the canvas size as a premultiplied uint16 (h, w, 4) array
+    (see _decode_trait) cropped to its visible area, from the on-disk cache
+    when it was made from this exact PNG (same mtime, size and inode), else
+    by decoding it (and filling the cache).
+
+    Returns ((top, left), array, opaque), or None if the trait is fully
+    transparent; opaque is True when every pixel of the crop has alpha 255.
+    The array is read-only and shared between editions.
+    """
+    source = _trait_source_stamp(path)
+    cache_path = _trait_cache_path(path, size, resample)
+    cached = _read_cached_trait(cache_path, source)
+    if cached is None:
+        cached = _decode_trait(path, size, resample)
+        if _write_cached_trait(cache_path, source, *cached):
+            # keep the mapped file rather than the decoded copy, so workers
+            # share the page cache instead of each holding a private array
+            cached = _read_cached_trait(cache_path, source) or cached
+    return None if cached[1] is None else cached
+
+
+def _decode_trait(path, size, resample):
+    """
+    Decode, resize and crop a trait PNG; see _load_trait. arr is None if fully
+    transparent.
+
+    Pixels are premultiplied at 16 bits with no rounding: colour channels
+    hold c * a and alpha holds a * 255 (both 0-65025), so faint edges keep
+    their full colour precision through blending (see _unpremultiply).
+    """
+    img = Image.open(path)
+    if img.format == "JPEG":
+        # let libjpeg decode at a reduced scale (still >= size) before resizing
+        img.draft(img.mode, size)
+    img = img.convert("RGBA")
+    if img.size != size:
+        img = img.resize(size, resample)
+    bbox = img.getchannel(3).getbbox()
+    if bbox is None:
+        return (0, 0), None, False
+    img = img.crop(bbox)
+    opaque = img.getchannel(3).getextrema() == (255, 255)
+    straight = np.asarray(img)
+    arr = np.empty(straight.shape, np.uint16)
+    np.multiply(straight[..., :3], straight[..., 3:4], out=arr[..., :3], dtype=np.uint16)
+    np.multiply(straight[..., 3:4], 255, out=arr[..., 3:4], dtype=np.uint16)
+    arr.flags.writeable = False
+    return (bbox[1], bbox[0]), arr, opaque
+
+
+# uint32 scratch for _blend_over, grown on demand and reused so a blend
+# allocates nothing (composition runs on one thread per worker process).
+_blend_scratch = np.empty(0, np.uint32)
+
+
+def _blend_over(dst, src):
+    """
+    Source-over composite of src onto dst, in place.
+    Both are premultiplied uint16 (h, w, 4) arrays of the same shape, as
+    made by _decode_trait; src alpha is always a multiple of 255.
+    """
+    global _blend_scratch
+    h, w = src.shape[:2]
+    n = h * w
+    if _blend_scratch.size < n * 9:
+        _blend_scratch = np.empty(n * 9, np.uint32)
+    # contiguous views: 4 channels of dst, 4 for the shifted copy, then 1
+    # channel of inverse alpha (0-255)
+    tmp = _blend_scratch[:n * 4].reshape(h, w, 4)
+    shifted = _blend_scratch[n * 4:n * 8].reshape(h, w, 4)
+    inv = _blend_scratch[n * 8:n * 9].reshape(h, w, 1)
+    np.copyto(tmp, dst)
+    np.floor_divide(src[..., 3:4], 255, out=inv)
+    np.subtract(255, inv, out=inv)
+    tmp *= inv
+    # exact rounded division by 255 for values up to 65025 * 255:
+    # t = x + 128; (t + ((t + (t >> 8)) >> 8)) >> 8
+    tmp += 128
+    np.right_shift(tmp, 8, out=shifted)
+    shifted += tmp
+    shifted >>= 8
+    tmp += shifted
+    tmp >>= 8
+    tmp += src
+    dst[...] = tmp
+
+
+def _unpremultiply(canvas):
+    """
+    Straight-alpha uint8 RGBA array for a premultiplied uint16 canvas, with
+    every channel rounded once: a = Q / 255 and c = 255 * P / Q.
+    """
+    q = canvas[..., 3:4].astype(np.uint32)
+    rgba = np.empty(canvas.shape, np.uint8)
+    t = q + 128
+    rgba[..., 3:4] = (t + (t >> 8)) >> 8
+    # round(255 * P / Q) == (510 * P + Q) // (2 * Q); P is 0 wherever Q is
+    p = canvas[..., :3].astype(np.uint32)
+    p *= 510
+    p += q
+    np.maximum(q, 1, out=q)
+    q *= 2
+    p //= q
+    rgba[..., :3] = p
+    return rgba
+
+
+if njit is not None:
+    # Single-threaded: it runs inside every pool worker, which already keep
+    # all cores busy; a parallel kernel would oversubscribe them.
+    @njit(fastmath=True, cache=True)
+    def _blend_over_jit(dst, src):
+        """
+        Numba version of _blend_over: one fused pass over the pixels, with
+        the same integer arithmetic, so both give identical results.
+        Transparent source pixels are skipped and opaque ones copied, which is
+        exact for premultiplied input.
+        """
+        for y in range(src.shape[0]):
+            for x in range(src.shape[1]):
+                q = np.int64(src[y, x, 3])
+                if q == 0:
+                    continue
+                if q == 65025:
+                    for c in range(4):
+                        dst[y, x, c] = src[y, x, c]
+                    continue
+                inv = 255 - q // 255
+                for c in range(4):
+                    t = np.int64(dst[y, x, c]) * inv + 128
+                    dst[y, x, c] = src[y, x, c] + ((t + ((t + (t >> 8)) >> 8)) >> 8)
+
+    @njit(fastmath=True, cache=True)
+    def _unpremultiply_jit(canvas):
+        """Numba version of _unpremultiply, with identical rounding."""
+        h, w = canvas.shape[:2]
+        rgba = np.empty((h, w, 4), np.uint8)
+        for y in range(h):
+            for x in range(w):
+                q = np.int64(canvas[y, x, 3])
+                t = q + 128
+                rgba[y, x, 3] = (t + (t >> 8)) >> 8
+                if q == 0:
+                    for c in range(3):
+                        rgba[y, x, c] = 0
+                    continue
+                for c in range(3):
+                    rgba[y, x, c] = (510 * np.int64(canvas[y, x, c]) + q) // (2 * q)
+        return rgba
+
+    _blend = _blend_over_jit
+    _finish = _unpremultiply_jit
+else:
+    _blend = _blend_over
+    _finish = _unpremultiply
+
+
+def _save_options(config):
+    """
+    Return (extension, Pillow save kwargs) for the config's output format.
+    PNG skips optimize and defaults to zlib level 1, which encodes several
+    times faster than Pillow's default 6 for slightly larger files.
+    """
+    fmt = str(config.get("image_format", "png")).lower()
+    if fmt == "webp":
+        return "webp", {"format": "WEBP", "quality": 90, "method": 4}
+    try:
+        level = min(max(int(config.get("png_compress_level", 1)), 0), 9)
+    except (TypeError, ValueError):
+        level = 1
+    return "png", {"format": "PNG", "compress_level": level, "optimize": False}
+
+
+# Output canvas reused by _compose_one across editions; only reallocated when
+# the canvas size changes (composition runs on one thread per worker process).
+_canvas = np.zeros((0, 0, 4), np.uint16)
+
+
+def _blank_canvas(height, width, covered):
+    """
+    Return the shared (height, width, 4) canvas, cleared to transparent
+    unless covered says the first layer will overwrite all of it.
+    """
+    global _canvas
+    if _canvas.shape[:2] != (height, width):
+        _canvas = np.zeros((height, width, 4), np.uint16)
+    elif not covered:
+        _canvas.fill(0)
+    return _canvas
+
+
+def _compose_one(task):
+    """
+    Composite a single NFT from its layer files inside a worker process.
+    Layers come from _load_trait (LRU and on-disk cache); saving is left to
+    _compose_batch.
+
+    task: (edition_number, layer_paths, output_path, size, resample, save_kwargs),
+    of which only layer_paths, size and resample are used here.
+    Returns (image, warnings) where warnings is a list of log lines.
+    """
+    _, layer_paths, _, size, resample, _ = task
+    warnings = []
+    width, height = size
+    layers = []
+    for img_path in layer_paths:
+        try:
+            layer = _load_trait(img_path, size, resample)
+        except Exception as e:
+            warnings.append(f"⚠️ Error loading '{img_path}': {e}")
+            continue
+        if layer is not None:
+            layers.append(layer)
+
+    # Everything under the topmost opaque full-canvas layer is hidden anyway.
+    start = 0
+    for i, ((top, left), src, opaque) in enumerate(layers):
+        if opaque and src.shape[:2] == (height, width):
+            start = i
+
+    layers = layers[start:]
+    out = _blank_canvas(height, width, bool(layers) and layers[0][1].shape[:2] == (height, width))
+    empty = True
+    for (top, left), src, opaque in layers:
+        region = out[top:top + src.shape[0], left:left + src.shape[1]]
+        if empty or opaque:
+            # over-blend onto transparent, or of an opaque layer, is a copy
+            np.copyto(region, src)
+            empty = False
+        else:
+            _blend(region, src)
+    # _finish copies, so the canvas is free for the next edition
+    return Image.fromarray(_finish(out), "RGBA"), warnings
+
+
+# Background encoders per worker process, and how many composited images may
+# wait for them before composition blocks (caps memory).
+SAVE_THREADS = 4
+SAVE_QUEUE_DEPTH = 16
+
+
+def _save_image(image, path, save_kwargs, gate):
+    try:
+        image.save(path, **save_kwargs)
+    finally:
+        gate.release()
+
+
+def _fast_clone(src, dst):
+    # shutil.copyfile uses os.sendfile on Linux: no decode/encode round-trip
+    shutil.copyfile(src, dst)
+
+
+def _clone_source(task):
+    """
+    If an edition is a single 8-bit RGBA PNG layer already at canvas size and
+    the output is PNG, the composite is that image unchanged: return its path
+    so it can be copied instead of decoded and re-encoded. Otherwise (e.g. a
+    palette, RGB or 16-bit source, which composites to RGBA) return None.
+    """
+    _, layer_paths, _, size, _, save_kwargs = task
+    if len(layer_paths) != 1 or save_kwargs.get("format") != "PNG":
+        return None
+    try:
+        with Image.open(layer_paths[0]) as img:
+            # 16-bit RGBA also opens as mode "RGBA"; its raw mode is "RGBA;16B"
+            raw_mode = img.tile[0][3] if img.tile else None
+            if img.format == "PNG" and img.mode == "RGBA" and raw_mode == "RGBA" and img.size == size:
+                return layer_paths[0]
+    except Exception:
+        pass
+    return None
+
+
+def _compose_batch(tasks):
+    """
+    Composite and save a batch of tasks inside a worker process. Saves run on
+    a small thread pool (Pillow releases the GIL while encoding), overlapping
+    each encode with the next composition.
+
+    Returns [(edition_number, warnings, error)] with error None on success.
+    All saves have finished when this returns.
+    """
+    results = []
+    saves = []
+    gate = threading.Semaphore(SAVE_QUEUE_DEPTH)
+    with ThreadPoolExecutor(max_workers=SAVE_THREADS) as save_pool:
+        for task in tasks:
+            edition_number, output_path, save_kwargs = task[0], task[2], task[5]
+            clone_src = _clone_source(task)
+            if clone_src is not None:
+                try:
+                    _fast_clone(clone_src, output_path)
+                    results.append((edition_number, [], None))
+                except Exception as e:
+                    results.append((edition_number, [], str(e)))
+                continue
+            try:
+                image, warnings = _compose_one(task)
+            except Exception as e:
+                results.append((edition_number, [], str(e)))
+                continue
+            gate.acquire()
+            future = save_pool.submit(_save_image, image, output_path, save_kwargs, gate)
+            saves.append((edition_number, warnings, future))
+
+        for edition_number, warnings, future in saves:
+            try:
+                future.result()
+                results.append((edition_number, warnings, None))
+            except Exception as e:
+                results.append((edition_number, warnings, str(e)))
+    return results
 
 
 def run_generation(config, edition_size, log_callback=None, progress_callback=None):
@@ -1013,6 +2074,12 @@ def run_generation(config, edition_size, log_callback=None, progress_callback=No
       mapping_sets: [mapping_set_name, ...]
       collection: { name, description }
       size: { width, height }
+      resample: one of RESAMPLE_NAMES (default "lanczos")
+      image_format: one of IMAGE_FORMATS (default "png")
+      png_compress_level: 0-9 (default 1)
+      seed: int for a reproducible collection (default None = random)
+      metadata_per_file: write metadata/<n>.json per edition instead of one
+        metadata/metadata.jsonl line per edition (default False)
     """
     layers_dir = config["layers_dir"]
     output_dir = config["output_dir"]
@@ -1022,21 +2089,25 @@ def run_generation(config, edition_size, log_callback=None, progress_callback=No
     size_conf = config.get("size", {}) or {}
     width = int(size_conf.get("width", 980))
     height = int(size_conf.get("height", 1280))
+    resample = _get_resample(config.get("resample"))
+    image_ext, save_kwargs = _save_options(config)
+    seed = config.get("seed")
+    metadata_per_file = bool(config.get("metadata_per_file", False))
 
+    # Create the output tree once up front; nothing below re-checks it.
+    # (Not cached across runs: master reset deletes these folders.)
     images_dir = os.path.join(output_dir, "images")
     metadata_dir = os.path.join(output_dir, "metadata")
     os.makedirs(images_dir, exist_ok=True)
     os.makedirs(metadata_dir, exist_ok=True)
 
+    _safe_log(log_callback, _accel_summary())
+
     # Merge all mapping set rules
     rules = _merge_mapping_sets(config, log_callback=log_callback)
-    trait_rarities = rules["trait_rarities"]
-    layer_rarities = rules["layer_rarities"]
-    include_pairs = rules["include_pairs"]
-    exclude_pairs = rules["exclude_pairs"]
 
     # Discover filesystem traits
-    all_traits = _collect_traits(layers_dir)
+    all_traits, paths_by_name = _collect_traits(layers_dir)
 
     # Default layer order if not provided
     if not layer_order:
@@ -1045,169 +2116,181 @@ def run_generation(config, edition_size, log_callback=None, progress_callback=No
     # Remove excluded layers from consideration
     final_layer_order = [L for L in layer_order if L in all_traits and L not in excluded_layers]
 
-    generated_dna = set()
+    # Per-layer data is kept in lists aligned with final_layer_order, so the
+    # edition loop indexes by layer position instead of looking up names.
+    options_by_layer = [all_traits[L] for L in final_layer_order]
+    rule_index = _index_rules(rules, final_layer_order, options_by_layer)
+
+    # Pre-draw the layer-rarity rolls and default trait picks for the whole
+    # run with one vectorized call per layer; the edition loop only indexes
+    # into them and falls back to a scalar draw when exclusions shrink a layer.
+    rng = np.random.default_rng(seed)
+    skip_rolls = []       # per layer: float32 rolls, or None if never skipped
+    default_picks = []    # per layer: trait indices drawn by rarity
+    for li, options in enumerate(options_by_layer):
+        skip_rolls.append(rng.random(edition_size, dtype=np.float32) if rule_index["layer_p"][li] < 1 else None)
+        weights = rule_index["layer_weights"][li]
+        total = weights.sum()
+        if total > 0:
+            default_picks.append(rng.choice(len(options), size=edition_size, p=weights / total))
+        else:
+            default_picks.append(rng.integers(len(options), size=edition_size))
+    # (edition_size, n_layers) as nested lists: one row of plain ints per edition
+    if default_picks:
+        pick_rows = np.stack(default_picks, axis=1).tolist()
+    else:
+        pick_rows = [[]] * edition_size
+
+    # Without include/exclude rules no layer's pick depends on another, so if
+    # every layer is always used an edition is just its pre-drawn row.
+    fast_path = (
+        not rule_index["has_exclusions"]
+        and not rule_index["include_by_src"]
+        and all(rolls is None for rolls in skip_rolls)
+    )
+
+    trait_index = [{t: i for i, t in enumerate(options)} for options in options_by_layer]
+    trait_paths = [paths_by_name[L] for L in final_layer_order]
+    generated_dna = set()    # DNA: tuple of per-layer trait indices (-1 = layer skipped)
     stats = {"success": 0, "duplicates": 0, "errors": 0}
+    canvas_size = (width, height)
+    coll_name = collection.get("name", "Collection")
+    description = collection.get("description", "")
+    # Built once; per edition only the number string is appended.
+    image_prefix = os.path.join(images_dir, "")
+    image_suffix = "." + image_ext
+    name_prefix = coll_name + " #"
+
+    # Trait selection is cheap and order-dependent (DNA dedup), so it runs
+    # here; composition is queued as tasks for the process pool below.
+    tasks = []
+    pending_metadata = {}    # edition -> metadata, written once its image is saved
+    done = 0
 
     for edition_number in range(1, edition_size + 1):
         try:
-            canvas_size = (width, height)
-            result_image = Image.new("RGBA", canvas_size)
-
-            selected = {}            # layer -> trait
-            selected_keys = []       # ["Layer:Trait", ...] for quick conflict checks
-            forced_selection = {}    # layer -> trait (caused by include mappings)
-
             # 1) Walk layers in order selecting traits
-            for layer in final_layer_order:
-                options = all_traits.get(layer, [])
-                if not options:
-                    continue
-
-                # Apply layer rarity (chance to skip a layer)
-                layer_p = int(layer_rarities.get(layer, 100))
-                must_include = layer in forced_selection  # inclusion map can force presence
-                if not must_include and random.random() > (layer_p / 100.0):
-                    # skip this layer entirely
-                    continue
-
-                # Forced selection from inclusion pairs?
-                chosen_trait = forced_selection.get(layer)
-
-                if chosen_trait is None:
-                    # If any selected trait requires an inclusion for THIS layer,
-                    # we restrict to the required trait (only mapping is used).
-                    required_trait_for_layer = None
-                    for a, b in include_pairs:
-                        # a requires b
-                        try:
-                            la, ta = a.split(":", 1)
-                            lb, tb = b.split(":", 1)
-                        except ValueError:
-                            continue
-                        if f"{la}:{ta}" in selected_keys and lb == layer:
-                            required_trait_for_layer = tb
-                            break
-
-                    if required_trait_for_layer is not None:
-                        if required_trait_for_layer in options:
-                            chosen_trait = required_trait_for_layer
-                        else:
-                            _safe_log(
-                                log_callback,
-                                f"⚠️ Inclusion requires '{layer}:{required_trait_for_layer}', but not found; skipping layer."
-                            )
-                            # If mapping says only the mapped trait should be used, and it's missing, skip layer.
-                            continue
-
-                if chosen_trait is None:
-                    # Weighted choice by trait rarities, minus excluded by pairs with already selected traits.
-                    viable_opts = []
-                    viable_wts = []
-                    for t in options:
-                        key = f"{layer}:{t}"
-                        if _is_excluded_by_pairs(key, selected_keys, exclude_pairs):
-                            continue
-                        weight = int(trait_rarities.get(key, 100))
-                        if weight < 0:
-                            weight = 0
-                        viable_opts.append(t)
-                        viable_wts.append(weight)
-
-                    if not viable_opts:
-                        # nothing compatible, skip layer
-                        continue
-
-                    chosen_trait = _weighted_choice(viable_opts, viable_wts)
-                    if chosen_trait is None:
-                        continue
-
-                # Register selection
-                selected[layer] = chosen_trait
-                key = f"{layer}:{chosen_trait}"
-                selected_keys.append(key)
-
-                # Handle inclusion chains: if selected key 'a' requires 'b', force it
-                for a, b in include_pairs:
-                    if key == a:
-                        try:
-                            lb, tb = b.split(":", 1)
-                        except ValueError:
-                            continue
-                        # Only set forced if target layer hasn't been processed yet
-                        if lb not in selected:
-                            forced_selection[lb] = tb
-
-            # 2) DNA and duplicate check
-            dna_parts = []
-            for layer in final_layer_order:
-                trait = selected.get(layer, "__none__")
-                dna_parts.append(f"{layer}:{trait}")
-            dna = "|".join(dna_parts)
+            picks = pick_rows[edition_number - 1]
+            if fast_path:
+                selected = [options[i] for options, i in zip(options_by_layer, picks)]
+            else:
+                selected = _select_traits(
+                    final_layer_order, options_by_layer, rule_index, skip_rolls,
+                    picks, edition_number - 1, rng, log_callback,
+                )
+
+            # 2) DNA and duplicate check on the per-layer trait indices
+            row = []
+            for li, trait in enumerate(selected):
+                if trait is None:
+                    row.append(-1)
+                else:
+                    index = trait_index[li]
+                    # forced inclusions may name traits that aren't on disk
+                    row.append(index.setdefault(trait, len(index)))
+            dna = tuple(row)
 
             if dna in generated_dna:
                 stats["duplicates"] += 1
                 _safe_log(log_callback, f"❌ Duplicate at #{edition_number}, skipping.")
+                done += 1
                 if progress_callback:
-                    progress_callback(edition_number, edition_size)
+                    progress_callback(done, edition_size)
                 continue
 
-            # 3) Composite image
-            for layer in final_layer_order:
-                trait = selected.get(layer)
+            # 3) Resolve layer files for the worker and the metadata attributes
+            layer_paths = []
+            attributes = []
+            for layer, trait, paths in zip(final_layer_order, selected, trait_paths):
                 if not trait or trait == "__none__":
                     continue
-                layer_path = os.path.join(layers_dir, layer)
-                img_path = os.path.join(layer_path, f"{trait}.png")
-                if not os.path.isfile(img_path):
-                    # try case-insensitive match
-                    files = [f for f in os.listdir(layer_path) if f.lower().endswith(".png")]
-                    match = next((f for f in files if os.path.splitext(f)[0].lower() == trait.lower()), None)
-                    if match:
-                        img_path = os.path.join(layer_path, match)
-                    else:
-                        _safe_log(log_callback, f"⚠️ Missing image for '{layer}:{trait}'")
-                        continue
-                try:
-                    layer_img = Image.open(img_path).convert("RGBA")
-                except Exception as e:
-                    _safe_log(log_callback, f"⚠️ Error loading '{img_path}': {e}")
+                attributes.append({"trait_type": layer, "value": trait})
+                img_path = paths.get(trait) or paths.get(trait.lower())
+                if img_path is None:
+                    _safe_log(log_callback, f"⚠️ Missing image for '{layer}:{trait}'")
                     continue
-                if layer_img.size != canvas_size:
-                    layer_img = layer_img.resize(canvas_size, RESAMPLE_LANCZOS)
-                result_image = Image.alpha_composite(result_image, layer_img)
+                layer_paths.append(img_path)
 
-            # 4) Save output
             generated_dna.add(dna)
-            file_name = f"{edition_number}.png"
-            result_image.save(os.path.join(images_dir, file_name))
-
-            attributes = []
-            for layer in final_layer_order:
-                trait = selected.get(layer)
-                if trait and trait != "__none__":
-                    attributes.append({"trait_type": layer, "value": trait})
-
-            coll_name = collection.get("name", "Collection")
-            description = collection.get("description", "")
-            metadata = {
-                "name": f"{coll_name} #{edition_number}",
+            edition_str = str(edition_number)
+            file_name = edition_str + image_suffix
+            tasks.append((
+                edition_number, layer_paths, image_prefix + file_name,
+                canvas_size, resample, save_kwargs,
+            ))
+
+            pending_metadata[edition_number] = {
+                "name": name_prefix + edition_str,
                 "description": description,
                 "image": file_name,
                 "attributes": attributes,
                 "edition": edition_number,
             }
-            with open(os.path.join(metadata_dir, f"{edition_number}.json"), "w") as mf:
-                json.dump(metadata, mf, indent=4)
-
-            stats["success"] += 1
-            _safe_log(log_callback, f"✅ Generated #{edition_number}")
 
         except Exception as e:
             stats["errors"] += 1
             _safe_log(log_callback, f"⚠️ Error on #{edition_number}: {e}")
+            done += 1
+            if progress_callback:
+                progress_callback(done, edition_size)
+
+    if not tasks:
+        return stats
+
+    # 4) Composite + save in parallel, in batches so each worker can overlap
+    # encoding with composition. "spawn" keeps workers from inheriting the Qt
+    # event loop threads of the GUI process.
+    workers = os.cpu_count() or 1
+    batch_size = max(1, min(32, len(tasks) // (workers * 4)))
+    # Order by layer files so each batch holds editions sharing their lower
+    # layers, which then stay hot in the worker's trait cache. Outputs are
+    # named by edition number and metadata is written in edition order, so
+    # the order is not visible in the results.
+    tasks.sort(key=lambda task: task[1])
+    batches = [tasks[i:i + batch_size] for i in range(0, len(tasks), batch_size)]
+
+    # Results arrive out of order; metadata is held back until every earlier
+    # edition has finished, so the output is the same for a seed on any machine.
+    edition_order = list(pending_metadata)   # ascending: filled by the loop above
+    next_pos = 0
+    finished = {}    # edition -> succeeded?, until its metadata is released
+    metadata_writer = JsonBatchWriter(metadata_dir, jsonl=not metadata_per_file)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            futures = {pool.submit(_compose_batch, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    results = future.result()
+                except Exception as e:
+                    # the whole batch was lost (e.g. a worker died)
+                    results = [(task[0], [], str(e)) for task in futures[future]]
+
+                for edition_number, warnings, error in results:
+                    for msg in warnings:
+                        _safe_log(log_callback, msg)
+                    finished[edition_number] = error is None
+                    if error is None:
+                        stats["success"] += 1
+                        _safe_log(log_callback, f"✅ Generated #{edition_number}")
+                    else:
+                        stats["errors"] += 1
+                        _safe_log(log_callback, f"⚠️ Error on #{edition_number}: {error}")
+
+                while next_pos < len(edition_order) and edition_order[next_pos] in finished:
+                    edition_number = edition_order[next_pos]
+                    next_pos += 1
+                    metadata = pending_metadata.pop(edition_number)
+                    if finished.pop(edition_number):
+                        metadata_writer.add(edition_number, metadata)
 
-        if progress_callback:
-            progress_callback(edition_number, edition_size)
+                done += len(results)
+                if progress_callback:
+                    progress_callback(done, edition_size)
+    finally:
+        metadata_writer.close()
 
     return stats
 
@@ -1216,6 +2299,9 @@ def run_generation(config, edition_size, log_callback=None, progress_callback=No
 # Entry point
 # =========================================================
 if __name__ == "__main__":
+    # frozen builds (e.g. PyInstaller on Windows) would otherwise start the
+    # GUI again in every spawned pool worker
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = NFTGeneratorGUI()
     window.show()
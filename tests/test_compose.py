@@ -0,0 +1,120 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import c3nft  # noqa: E402
+
+SIZE = (64, 48)
+
+
+def _write_layers(root, count, seed=1):
+    """Random canvas-size RGBA traits with many faint (alpha < 20) pixels."""
+    rng = np.random.default_rng(seed)
+    w, h = SIZE
+    paths = []
+    for i in range(count):
+        px = rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+        faint = rng.random((h, w)) < 0.3
+        px[..., 3][faint] = rng.integers(0, 20, int(faint.sum()))
+        path = os.path.join(root, f"L{i}", "t.png")
+        os.makedirs(os.path.dirname(path))
+        Image.fromarray(px, "RGBA").save(path)
+        paths.append(path)
+    return paths
+
+
+def _compose(paths):
+    image, warnings = c3nft._compose_one((1, paths, None, SIZE, c3nft.RESAMPLE, None))
+    assert not warnings, warnings
+    return np.asarray(image).astype(int)
+
+
+def _alpha_composite(paths):
+    out = Image.new("RGBA", SIZE)
+    for path in paths:
+        out = Image.alpha_composite(out, Image.open(path).convert("RGBA"))
+    return np.asarray(out).astype(int)
+
+
+class ComposeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        c3nft._load_trait.cache_clear()
+
+    def tearDown(self):
+        c3nft._load_trait.cache_clear()
+        self.tmp.cleanup()
+
+    def test_semi_transparent_matches_alpha_composite(self):
+        paths = _write_layers(self.tmp.name, 3)
+        got = _compose(paths)
+        ref = _alpha_composite(paths)
+        self.assertTrue((got[..., 3] < 255).any())
+        self.assertLessEqual(np.abs(got - ref).max(), 1)
+
+    def test_single_layer_composite_matches_clone(self):
+        # the clone shortcut and the composite path must give the same image
+        # (colour under alpha 0 is not visible and not compared)
+        paths = _write_layers(self.tmp.name, 1)
+        task = (1, paths, None, SIZE, c3nft.RESAMPLE, {"format": "PNG"})
+        self.assertEqual(c3nft._clone_source(task), paths[0])
+        got = _compose(paths)
+        src = np.asarray(Image.open(paths[0])).astype(int)
+        np.testing.assert_array_equal(got[..., 3], src[..., 3])
+        visible = src[..., 3] > 0
+        np.testing.assert_array_equal(got[visible], src[visible])
+
+    def test_disk_cache_detects_replaced_png_with_same_mtime(self):
+        path = _write_layers(self.tmp.name, 1)[0]
+        before = os.stat(path)
+        c3nft._load_trait(path, SIZE)
+        # replace the file (new inode and size) but restore the old mtime,
+        # as cp -p or an archive extraction would
+        tmp = path + ".new"
+        Image.new("RGBA", SIZE, (200, 10, 10, 255)).save(tmp, "PNG")
+        os.replace(tmp, path)
+        os.utime(path, ns=(before.st_atime_ns, before.st_mtime_ns))
+        c3nft._load_trait.cache_clear()
+        _, arr, opaque = c3nft._load_trait(path, SIZE)
+        self.assertTrue(opaque)
+        self.assertEqual(int(arr[0, 0, 0]), 200 * 255)
+
+    def test_clone_requires_rgba_source(self):
+        path = os.path.join(self.tmp.name, "rgb.png")
+        Image.new("RGB", SIZE, (10, 20, 30)).save(path)
+        task = (1, [path], None, SIZE, c3nft.RESAMPLE, {"format": "PNG"})
+        self.assertIsNone(c3nft._clone_source(task))
+
+
+
+def _premultiplied(rng, shape):
+    """Random uint16 premultiplied pixels, with fully clear and opaque ones."""
+    px = rng.integers(0, 256, shape, dtype=np.uint16)
+    px[..., 3][rng.random(shape[:2]) < 0.2] = 0
+    px[..., 3][rng.random(shape[:2]) < 0.2] = 255
+    out = np.empty(shape, np.uint16)
+    out[..., :3] = px[..., :3] * px[..., 3:4]
+    out[..., 3] = px[..., 3] * 255
+    return out
+
+
+@unittest.skipIf(c3nft.njit is None, "numba not installed")
+class NumbaParityTest(unittest.TestCase):
+    def test_kernels_match_numpy(self):
+        rng = np.random.default_rng(3)
+        dst = _premultiplied(rng, (50, 40, 4))
+        src = _premultiplied(rng, (50, 40, 4))
+        a, b = dst.copy(), dst.copy()
+        c3nft._blend_over(a, src)
+        c3nft._blend_over_jit(b, src)
+        np.testing.assert_array_equal(a, b)
+        np.testing.assert_array_equal(c3nft._unpremultiply(a), c3nft._unpremultiply_jit(a))
+
+
+if __name__ == "__main__":
+    unittest.main()